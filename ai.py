@@ -35,6 +35,20 @@ _configs.append([])   # adding the (empty) list of 0-stick configs
 # List of known losing configurations
 _losing_configs = []
 
+# The same losing configurations, sorted by number of sticks:
+# _losing_configs_by_size[n] is the list of n-stick LCs
+_losing_configs_by_size = []
+
+# The same losing configurations as a set of tuples, for fast lookups
+_losing_configs_set = set()
+
+# Results of _reachable_losing_configs, so that positions that come up again
+# during a game or in later games are not analysed twice.
+# keys: configs, as tuples
+# values: lists of LCs
+# Emptied by set_rules, since the results depend on the rules.
+_reachable_cache = {}
+
 # A dictionary to backup the LC-lists that were built with different values of
 # max_take, so that they need not be recomputed when changing settings.
 # keys: max_take
@@ -71,6 +85,29 @@ def _move_exists(config_from, config_to, max_take):
     return len(c_from) == 1
 
 
+def _next_configs(config, max_take):
+    """Generates the configs (as tuples) that can be reached in one move from
+    @config by removing at most @max_take sticks. A config may be generated
+    several times.
+    """
+    seen_groups = set()
+    for i, group in enumerate(config):
+        # taking sticks from a group or from another group of the same size
+        # leads to the same configs
+        if group in seen_groups:
+            continue
+        seen_groups.add(group)
+        other_groups = config[:i] + config[i + 1:]
+        for take in range(1, min(max_take, group) + 1):
+            # the sticks left in the group end up on the left and right of
+            # the removed ones (by symmetry, left <= right is enough)
+            left_over = group - take
+            for left in range(left_over // 2 + 1):
+                right = left_over - left
+                new_groups = [g for g in (left, right) if g > 0]
+                yield tuple(sorted(other_groups + new_groups, reverse=True))
+
+
 def _describe_move_between(config_from, config_to):
     """Returns a triplet of integers describing what move you need to make to
     get from @config_from to @config_to:
@@ -111,12 +148,10 @@ def _build_configs(up_to, start_from=1):
     """
     global _configs
     for n in range(start_from, up_to + 1):
-        # n-stick config list initialisation
-        _configs.append([])
-        # no 0-group configs
-        _configs[n].append([])
-        # the only 1-group config: one group of n sticks
-        _configs[n].append([[n]])
+        # n-stick config list initialisation, with:
+        # - no 0-group configs
+        # - the only 1-group config: one group of n sticks
+        configs_n = [[], [[n]]]
         for k in range(2, n + 1):
             # Creating the list of n-stick k-group configs
             # Such a config can either be:
@@ -125,52 +160,65 @@ def _build_configs(up_to, start_from=1):
             # B. an (n-k)-stick k-group config in which you add one stick to
             #    every group
             # More info: https://en.wikipedia.org/wiki/Partition_(number_theory)
-            _configs[n].append([])
             # Set A
-            new_configs = []
-            for c in _configs[n - 1][k - 1]:
-                new_c = c[:]
-                new_c.append(1)    # adding the 1-stick group
-                new_configs.append(new_c)
-            _configs[n][k].extend(new_configs)
+            configs_nk = [c + [1] for c in _configs[n - 1][k - 1]]
             # Set B
-            if k > n - k:
-                continue
-            new_configs = []
-            for c in _configs[n - k][k]:
-                # adding a stick to every group
-                new_configs.append([x + 1 for x in c])
-            _configs[n][k].extend(new_configs)
+            if k <= n - k:
+                configs_nk.extend([[x + 1 for x in c]
+                                   for c in _configs[n - k][k]])
+            configs_n.append(configs_nk)
+        # only added once complete, so that an interrupted build can resume
+        # from this n
+        _configs.append(configs_n)
 
 
-# Slowest function. On my computer (core i5 from 2018):
+# Slowest function. With max_take = 3, on my computer:
 # @up_to   Time
-# 20       ~100 ms
-# 30       ~10 s
-# 40       ~10 min
+# 20       ~15 ms
+# 30       ~200 ms
+# 40       ~2 s
 def _build_losing_configs(up_to, max_take, start_from=1):
     """Builds the list of all losing configurations made of @up_to sticks or
     fewer.
     Requires that the _configs table has been computed (with _build_configs)
-    at least up to @up_to.
+    at least up to @up_to, and that _losing_configs_by_size and
+    _losing_configs_set are filled up to @start_from - 1 (see
+    _index_losing_configs).
     """
-    # For all configs, scan the list of known LCs, looking for an LC that can
-    # be reached from the current config. If none is found, it means this
-    # current config is losing: add it to the list.
+    # For all configs, look for an LC that can be reached from the current
+    # config. If none is found, it means this current config is losing: add it
+    # to the list.
     global _losing_configs
     for n in range(start_from, up_to + 1):
+        losing_configs_n = []
         # shortcut: when n is odd, no n-stick config is losing except for
         # [1, 1, ..., 1] (I don't have proof for this).
         if n % 2 == 1:
-            _losing_configs.append([1] * n)
-            continue
-        for k in range(1, n + 1):
-            for config in _configs[n][k]:
-                for lc in _losing_configs:
-                    if _move_exists(config, lc, max_take):
-                        break
-                else:  # no break
-                    _losing_configs.append(config)
+            losing_configs_n.append([1] * n)
+        else:
+            for k in range(1, n + 1):
+                for config in _configs[n][k]:
+                    for next_config in _next_configs(config, max_take):
+                        if next_config in _losing_configs_set:
+                            break
+                    else:  # no break
+                        losing_configs_n.append(config)
+        _losing_configs.extend(losing_configs_n)
+        _losing_configs_by_size.append(losing_configs_n)
+        _losing_configs_set.update(map(tuple, losing_configs_n))
+
+
+def _index_losing_configs(up_to):
+    """Fills the _losing_configs_by_size table and the _losing_configs_set set
+    from the _losing_configs list, which must contain all the LCs made of
+    @up_to sticks or fewer.
+    """
+    global _losing_configs_by_size
+    global _losing_configs_set
+    _losing_configs_by_size = [[] for _ in range(up_to + 1)]
+    for lc in _losing_configs:
+        _losing_configs_by_size[sum(lc)].append(lc)
+    _losing_configs_set = set(map(tuple, _losing_configs))
 
 
 def _reachable_losing_configs(config_from):
@@ -178,8 +226,18 @@ def _reachable_losing_configs(config_from):
     one move from @config_from.
     Note: if the result is not empty, it means @config_from is a winning config.
     """
-    return [c for c in _losing_configs
-            if _move_exists(config_from, c, _settings.max_take)]
+    key = tuple(config_from)
+    if key not in _reachable_cache:
+        # A move takes between 1 and max_take sticks: only LCs of these sizes
+        # can be reached
+        n = sum(config_from)
+        max_take = _settings.max_take
+        _reachable_cache[key] = [
+            c
+            for lcs in _losing_configs_by_size[max(0, n - max_take):n]
+            for c in lcs
+            if _move_exists(config_from, c, max_take)]
+    return _reachable_cache[key]
 
 
 def _losing_message_about(losing_config):
@@ -298,14 +356,26 @@ def set_rules(settings):
     global _losing_configs
     size = settings.board_size
     max_take = settings.max_take
-    # fetch backed up data if any
-    known_size, _losing_configs = \
+    # nothing to do if these rules are already in use: keep the tables and the
+    # positions analysed so far
+    # (_settings only matches once the tables are fully built, so a build that
+    # was interrupted is started over)
+    if size == _settings.board_size and max_take == _settings.max_take:
+        return
+    _settings.board_size = 0
+    _settings.max_take = 0
+    # fetch backed up data if any. The list is copied so that an interrupted
+    # build leaves the backup untouched.
+    known_size, losing_configs = \
         _losing_backup[max_take] if max_take in _losing_backup else (0, [])
+    _losing_configs = losing_configs[:]
+    _index_losing_configs(known_size)
 
-    _settings.board_size = size
-    _settings.max_take = max_take
+    _reachable_cache.clear()
     _build_configs(up_to=size, start_from=len(_configs))
     _build_losing_configs(size, max_take, start_from=known_size + 1)
+    _settings.board_size = size
+    _settings.max_take = max_take
     # if we've built new things, back them up
     if loading_needed(settings):
         _losing_backup[max_take] = (size, _losing_configs)
@@ -1,6 +1,7 @@
 """Tests for the AI module"""
 
 import random
+from itertools import islice
 
 import ai
 from mechanics import Board, Settings
@@ -27,15 +28,16 @@ def to_board(config, board_size=None, shuffle=False):
     if shuffle:
         random.shuffle(conf)
 
-    slots = []
     gap = 0
     stick = 1
-    for group in conf:
-        slots.extend([stick] * group + [gap])
-    # remove the extra gap
-    slots.pop()
-    # add possible extra empty slots
-    slots.extend([gap] * (board_size - len(slots)))
+    # start with sticks everywhere groups are laid, then empty slots
+    slots = [stick] * min_size + [gap] * (board_size - min_size)
+    # put a gap after every group but the last one
+    i = 0
+    for group in conf[:-1]:
+        i += group
+        slots[i] = gap
+        i += 1
     return Board.from_list(slots, stick, gap)
 
 
@@ -43,11 +45,10 @@ def sizeof_configs():
     """Returns how many configurations are stored in the global _configs table
     of the ai module.
     """
-    n_configs = 0
-    for n in range(1, len(ai._configs)):
-        for k in range(1, n + 1):
-            n_configs += len(ai._configs[n][k])
-    return n_configs
+    # _configs[0] and every _configs[n][0] are empty lists
+    return sum(len(configs_nk)
+               for configs_n in ai._configs
+               for configs_nk in configs_n)
 
 
 def composite(config1, config2):
@@ -56,19 +57,42 @@ def composite(config1, config2):
 
 
 def contains(config, sub_config):
-    """Returns True if all the groups of @sub_config are found in @config."""
+    """Returns True if all the groups of @sub_config are found in @config.
+    Both configs are sorted in decreasing order, so a single pass over them is
+    enough."""
+    n = len(config)
+    i = 0
     for group in sub_config:
-        if config.count(group) < sub_config.count(group):
+        while i < n and config[i] > group:
+            i += 1
+        if i == n or config[i] != group:
             return False
+        i += 1
     return True
 
 
+def without(config, sub_config):
+    """Returns a new configuration made of @config’s groups, minus the groups
+    of @sub_config. Requires that contains(config, sub_config) is True."""
+    result = []
+    n = len(sub_config)
+    j = 0
+    for group in config:
+        if j < n and group == sub_config[j]:
+            j += 1
+        else:
+            result.append(group)
+    return result
+
+
 def prune_losing_configs(losing_configs):
     """Returns the list of known losing configurations, barring:
     - Configs ending with a pair or several pairs of 1s
     - Configs made up of several losing sub-configs
     """
     pruned_losing_configs = []
+    # for fast membership tests
+    losing_set = frozenset(map(tuple, losing_configs))
 
     for c in losing_configs:
         pruned = c[:]
@@ -87,15 +111,18 @@ def prune_losing_configs(losing_configs):
             to_remove = n_1 - n_1 % 2
             del pruned[-to_remove:]
         # then delete losing sub-configs, provided the resulting config remains
-        # losing
-        for lc in pruned_losing_configs[1:]:
+        # losing. The first one, [1], was taken care of above. islice avoids
+        # copying the whole list for every config.
+        for lc in islice(pruned_losing_configs, 1, None):
+            # cheap checks first: lc cannot fit in pruned if it has a larger
+            # group or more groups
+            if lc[0] > pruned[0] or len(lc) > len(pruned):
+                continue
             while contains(pruned, lc):
                 # try to delete lc
-                without_lc = pruned[:]
-                for group in lc:
-                    without_lc.remove(group)
+                without_lc = without(pruned, lc)
                 # if the result is still losing, confirm deletion
-                if without_lc == [] or without_lc in losing_configs:
+                if without_lc == [] or tuple(without_lc) in losing_set:
                     pruned = without_lc
                 else:       # without_lc is winning
                     break   # go to the next LC
@@ -112,7 +139,9 @@ def prune_losing_configs(losing_configs):
 def usage():
     print("Usage :\n"
           "    python", sys.argv[0], "board_size [max_take]\n"
-          "    if unspecified, max_take defaults to 3")
+          "    if unspecified, max_take defaults to 3\n"
+          "It also runs with PyPy, which is faster on large boards:\n"
+          "    pypy3", sys.argv[0], "board_size [max_take]")
 
 
 if __name__ == "__main__":
@@ -137,10 +166,14 @@ if __name__ == "__main__":
     print(" Sticky-Nim ==== AI Test ".center(SCREEN_WIDTH, '='))
     print("    Board size: ", board_size, "sticks")
     print("    Max take:   ", max_take, "sticks per turn")
-    t = time.clock()
+    t = time.perf_counter()
     ai.set_rules(Settings(board_size, max_take))
-    t_init = round((time.clock() - t) * 1000, 1)  # milliseconds
+    t_init = round((time.perf_counter() - t) * 1000, 1)  # milliseconds
+    # a first run warms up JIT-based interpreters such as PyPy before timing
+    prune_losing_configs(ai._losing_configs)
+    t = time.perf_counter()
     main_losing_configs = prune_losing_configs(ai._losing_configs)
+    t_prune = round((time.perf_counter() - t) * 1000, 1)  # milliseconds
 
     # print(" Configurations ".center(SCREEN_WIDTH, '-'))
     # for n in range(1, len(ai._configs)):
@@ -163,7 +196,8 @@ if __name__ == "__main__":
     print(f"Configurations: {total}")
     print(f"Losing configurations: {losing} ({round(losing / total * 100, 2)}"
           f" %) (built in {t_init} ms)")
-    print(f"Main losing configurations: {len(main_losing_configs)}")
+    print(f"Main losing configurations: {len(main_losing_configs)} "
+          f"(pruned in {t_prune} ms)")
     print("-" * SCREEN_WIDTH)
 
     test_configs = [
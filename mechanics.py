@@ -3,7 +3,7 @@
 """
 
 
-from collections import Sequence
+from collections.abc import Sequence
 
 
 class Board(Sequence):
@@ -13,6 +13,8 @@ class Board(Sequence):
     called gaps.
     """
 
+    __slots__ = ('_bits', '_size', '_process_cache', 'a_stick', 'a_gap')
+
     _DEFAULT_STICK_CHAR = '|'
     _DEFAULT_GAP_CHAR = '-'
 
@@ -27,24 +29,42 @@ class Board(Sequence):
         @a_gap: internal value representing an empty slot on the board.
         @slots: the contents of the board. A list containing only sticks or gaps
         (i.e. instances of a_stick or a_gap).
+        The contents are stored as an integer bitmask: bit i is set when slot i
+        contains a stick.
         """
         if a_stick is None:
             a_stick = 1
         if a_gap is None:
             a_gap = 0
         if slots is None:
-            self._slots = [a_stick] * size
+            self._bits = (1 << size) - 1
         else:
-            for s in slots:
-                if s not in (a_stick, a_gap):
+            bits = 0
+            for i, s in enumerate(slots):
+                if s == a_stick:
+                    bits |= 1 << i
+                elif s != a_gap:
                     raise ValueError("Provided list contains unknown value ("
                                      f"{str(s)} instead of {str(a_gap)} "
                                      f"or {str(a_stick)})")
-            self._slots = slots
+            self._bits = bits
+            size = len(slots)
+        self._size = size
+        # Result of the last call to _process, along with the bitmask it was
+        # computed from
+        self._process_cache = (None, [], [])
         self.a_stick = a_stick
         self.a_gap = a_gap
         super().__init__()
 
+    @classmethod
+    def _from_bits(cls, bits, size, a_stick, a_gap):
+        """Creates and returns a Board of @size slots whose content is described
+        by the bitmask @bits."""
+        board = cls(size, None, a_stick, a_gap)
+        board._bits = bits
+        return board
+
     @classmethod
     def from_list(cls, slots, a_stick, a_gap):
         """Creates and returns a Board whose content is described by the list
@@ -69,47 +89,40 @@ class Board(Sequence):
             a_gap = cls.gap_char
         return cls(len(string), list(string), a_stick, a_gap)
 
+    @property
+    def bits(self):
+        """The content of this Board as an integer bitmask: bit i is set when
+        slot i contains a stick."""
+        return self._bits
+
     def __repr__(self):
-        return f"{self._slots} (sticks: {self.a_stick}, gaps: {self.a_gap})"
+        return f"{list(self)} (sticks: {self.a_stick}, gaps: {self.a_gap})"
 
     def __str__(self):
         """Example typical board representation:
         ||-|||--|
         where '|' are sticks and '-' are gaps.
         """
-        board = []
-        for s in self._slots:
-            if s == self.a_stick:
-                board.append(self.stick_char)
-            elif s == self.a_gap:
-                board.append(self.gap_char)
-            else:
-                raise ValueError("Board contains unknown value "
-                                 f"{str(s)} instead of {str(self.a_stick)} "
-                                 f"or {str(self.a_gap)}")
-        return ''.join(board)
+        # The extra bit keeps the leading gaps in the binary representation.
+        # bin() writes the last slot first, hence the reversal.
+        digits = bin(self._bits | 1 << self._size)[:2:-1]
+        return digits.translate(str.maketrans('10',
+                                              self.stick_char + self.gap_char))
 
     def __eq__(self, other):
         """Returns True if the specified Boards are the same length and contain
         sticks and gaps at the same spots, i.e. if they have the same string
         representation."""
+        if isinstance(other, Board):
+            return self._size == other._size and self._bits == other._bits
         return str(self) == str(other)
 
     def __iter__(self):
-        self.iter_index = -1
-        return self
-
-    def __next__(self):
-        # Iterate through the self._slots list
-        self.iter_index += 1
-        if self.iter_index == len(self._slots):
-            raise StopIteration
-        s = self._slots[self.iter_index]
-        if s == self.a_gap or s == self.a_stick:
-            return s
-        else:
-            raise ValueError(f"Board contains unknown value ({str(s)} instead "
-                             f"of {str(self.a_stick)} or {str(self.a_gap)})")
+        bits = self._bits
+        stick = self.a_stick
+        gap = self.a_gap
+        for i in range(self._size):
+            yield stick if bits >> i & 1 else gap
 
     def __getitem__(self, item):
         """If @item is an integer, returns the content of this Board at the
@@ -117,52 +130,89 @@ class Board(Sequence):
         corresponding sub-Board.
         """
         if isinstance(item, Move):
-            return __class__.from_list(self._slots[item.left:item.right],
-                                       self.a_stick,
-                                       self.a_gap)
+            item = slice(item.left, item.right)
         if isinstance(item, slice):
-            return __class__.from_list(self._slots[item],
-                                       self.a_stick,
-                                       self.a_gap)
+            start, stop, step = item.indices(self._size)
+            if step != 1:
+                slots = [self[i] for i in range(start, stop, step)]
+                return __class__.from_list(slots, self.a_stick, self.a_gap)
+            size = max(0, stop - start)
+            bits = self._bits >> start & ((1 << size) - 1)
+            return __class__._from_bits(bits, size, self.a_stick, self.a_gap)
         else:
-            return self._slots[item]
+            if item < 0:
+                item += self._size
+            if not 0 <= item < self._size:
+                raise IndexError("Board index out of range")
+            return self.a_stick if self._bits >> item & 1 else self.a_gap
 
     def __len__(self):
         """Returns the number of sticks that this Board can contain."""
-        return len(self._slots)
+        return self._size
+
+    def __contains__(self, value):
+        """Returns True if at least one slot of this Board contains @value."""
+        if value == self.a_stick:
+            return self._bits != 0
+        elif value == self.a_gap:
+            return self._bits != (1 << self._size) - 1
+        else:
+            return False
+
+    def count(self, value):
+        """Returns the number of slots of this Board that contain @value."""
+        sticks = bin(self._bits).count('1')
+        if value == self.a_stick:
+            return sticks
+        elif value == self.a_gap:
+            return self._size - sticks
+        else:
+            return 0
 
     def reset(self):
         """Fills this Board with sticks, making it ready for a new game."""
-        for i in range(len(self._slots)):
-            self._slots[i] = self.a_stick
+        self._bits = (1 << self._size) - 1
 
     def is_empty(self):
         """Returns True if this Board only contains gaps. Typically called to
         check whether a game has ended."""
-        return self.a_stick not in self._slots
+        return not self._bits
+
+    def _window(self, left, right):
+        """Returns the bits of this Board’s slots from @left included to @right
+        excluded, along with the mask of the same width."""
+        mask = (1 << max(0, min(right, self._size) - left)) - 1
+        return self._bits >> left & mask, mask
+
+    def _has_gap_in(self, left, right):
+        """Returns True if there is a gap in the slice [left:right] of this
+        Board."""
+        window, mask = self._window(left, right)
+        return window != mask
 
     def _process(self):
         """Computes and returns to_config() and to_groups() as a duple.
-        See to_config() and to_groups() below."""
-        config = []
+        See to_config() and to_groups() below.
+        The result is kept until the content of this Board changes."""
+        bits = self._bits
+        cached_bits, config, groups = self._process_cache
+        if cached_bits == bits:
+            return config[:], groups[:]
+        # A group starts on a stick that has no stick on its left, and ends on a
+        # stick that has no stick on its right. Only these bits are visited.
+        starts = bits & ~(bits << 1)
+        ends = bits & ~(bits >> 1)
         groups = []
-        group_size = 0
-        group_start = 0
-        # Adding an extra slot at the end of the board avoids duplicated code
-        # after the for loop below
-        extended_board = __class__.from_string(str(self) + Board.gap_char)
-        for i, slot in enumerate(extended_board):
-            if slot == extended_board.a_stick:
-                if group_size == 0:
-                    group_start = i
-                group_size += 1
-            else:
-                if group_size > 0:  # we've reached the end of a group of sticks
-                    config.append(group_size)
-                    groups.append((group_start, group_size))
-                    group_size = 0
-        config.sort(reverse=True)
-        return config, groups
+        while starts:
+            lowest_start = starts & -starts
+            lowest_end = ends & -ends
+            group_start = lowest_start.bit_length() - 1
+            groups.append((group_start, lowest_end.bit_length() - group_start))
+            starts ^= lowest_start
+            ends ^= lowest_end
+        config = sorted((size for _, size in groups), reverse=True)
+        self._process_cache = (bits, config, groups)
+        return config[:], groups[:]
 
     def to_config(self):
         """Returns the configuration (see the readme) that summarizes this
@@ -193,6 +243,15 @@ class Board(Sequence):
         Play Move(5, 7) and the Board becomes '|||-|--||-', or
         play Move(6, 8) and the Board becomes '|||-||--|-'.
         """
+        coords = self.list_move_coords(take, group_size, offset)
+        if coords is None:
+            return None
+        return [Move(left, right) for left, right in coords]
+
+    def list_move_coords(self, take, group_size, offset=0):
+        """Same as list_moves, but returns (left, right) pairs of indices
+        instead of Moves.
+        """
         if take + offset > group_size:
             return None
         groups = self.to_groups()
@@ -201,7 +260,7 @@ class Board(Sequence):
             if size == group_size:
                 take_starts = [i_start + offset, i_start + size - offset - take]
                 for i in set(take_starts):  # set removes a possible duplicate
-                    fitting_moves.append(Move(i, i + take))
+                    fitting_moves.append((i, i + take))
         return fitting_moves
 
     def play_move(self, move):
@@ -211,11 +270,9 @@ class Board(Sequence):
         legal), False if there were any gaps in the slice (the move was
         definitely illegal).
         """
-        move_contained_gap = False
-        for i in range(move.left, move.right):
-            if self._slots[i] == self.a_gap:
-                move_contained_gap = True
-            self._slots[i] = self.a_gap
+        mask = ((1 << (move.right - move.left)) - 1) << move.left
+        move_contained_gap = (self._bits & mask) != mask
+        self._bits &= ~mask
         return not move_contained_gap
 
 
@@ -231,6 +288,17 @@ class Move:
     left should always be less than right. Using negative indices may result in
     undefined behavior.
     """
+    __slots__ = ('left', 'right')
+
+    # Values returned by legality()
+    LEGAL = 0
+    OUT_OF_BOUNDS = 1
+    NO_STICKS = 2       # the move only covers gaps
+    NOT_ADJACENT = 3    # sticks not next to each other, but few enough
+    EDGE_GAPS = 4       # a legal move once stripped of the gaps at its edges
+    SCATTERED = 5       # sticks not next to each other, and too many of them
+    TOO_MANY = 6        # no gaps, but too many sticks
+
     def __init__(self, index_1, index_2):
         self.left = min(index_1, index_2)
         self.right = max(index_1, index_2)
@@ -249,13 +317,10 @@ class Move:
         return self.right - self.left
 
     def __eq__(self, other):
-        """Returns True if both Moves have the same left and right attributes,
-        or if they are both None."""
-        if self is None:
-            return other is None
-        else:
-            return other is not None \
-                and self.left == other.left and self.right == other.right
+        """Returns True if both Moves have the same left and right attributes.
+        """
+        return other is not None \
+            and self.left == other.left and self.right == other.right
 
     def is_out_of_bounds_on(self, board):
         """Returns True if this Move’s indices are out of the specified Board’s
@@ -270,7 +335,7 @@ class Move:
 
     def contains_gap_on(self, board):
         """Returns True if the slice of the specified Board contains a gap."""
-        return board.a_gap in board[self.left:self.right]
+        return board._has_gap_in(self.left, self.right)
 
     def takes_too_many_for(self, max_take):
         """Returns True if the number of sticks that this Move would remove is
@@ -280,9 +345,33 @@ class Move:
 
     def is_legal_in(self, game):
         """Returns True if this Move can be played in the specified Game."""
-        return not self.is_out_of_bounds_on(game.board) \
-            and not self.contains_gap_on(game.board) \
-            and not self.takes_too_many_for(game.settings.max_take)
+        return self.legality(game) == __class__.LEGAL
+
+    def legality(self, game):
+        """Returns LEGAL if this Move can be played in the specified Game.
+        Otherwise, returns one of the other values listed at the top of this
+        class, telling why it cannot be played.
+        """
+        board = game.board
+        max_take = game.settings.max_take
+        if self.is_out_of_bounds_on(board):
+            return __class__.OUT_OF_BOUNDS
+        window, mask = board._window(self.left, self.right)
+        if window == mask:
+            # no gaps
+            if len(self) > max_take:
+                return __class__.TOO_MANY
+            return __class__.LEGAL
+        if not window:
+            return __class__.NO_STICKS
+        if bin(window).count('1') > max_take:
+            return __class__.SCATTERED
+        # drop the gaps on the right of the window (i.e. the left of the move):
+        # the sticks are next to each other iff what remains looks like 0b11…1
+        stripped = window // (window & -window)
+        if stripped & (stripped + 1):
+            return __class__.NOT_ADJACENT
+        return __class__.EDGE_GAPS
 
     def strip_on(self, board):
         """Returns a new Move that is stripped of any gaps that the specified
@@ -299,14 +388,12 @@ class Move:
         # |-|-||--|
         #   xxxx
         """
-        if board.a_stick not in board[self.left:self.right]:
+        window = board._window(self.left, self.right)[0]
+        if not window:
             return None
-        new_left = self.left
-        while board[new_left] == board.a_gap:
-            new_left += 1
-        new_right = self.right
-        while board[new_right - 1] == board.a_gap:
-            new_right -= 1
+        # the lowest and highest set bits of the window are the outer sticks
+        new_left = self.left + (window & -window).bit_length() - 1
+        new_right = self.left + window.bit_length()
         return __class__(new_left, new_right)
 
 
@@ -316,6 +403,8 @@ class Player:
     - action: a function that takes a Player and a Game, and returns the Move
       that the player wishes to play on the Game’s Board.
     """
+    __slots__ = ('name', 'action')
+
     def __init__(self, name, action_function):
         self.name = name
         self.action = action_function
@@ -330,6 +419,8 @@ class Settings:
     - board_size
     - max_take
     """
+    __slots__ = ('board_size', 'max_take')
+
     def __init__(self, board_size, max_take):
         self.board_size = board_size
         self.max_take = max_take
@@ -341,6 +432,8 @@ class Game:
     - settings: contains the board size and the maximum number of sticks a
       player may take on his turn.
     """
+    __slots__ = ('players', 'settings', 'board')
+
     def __init__(self, players, settings):
         self.players = players
         self.settings = settings
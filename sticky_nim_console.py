@@ -1,6 +1,9 @@
 """Sticky-Nim - Console interface"""
 
+import itertools
 import random
+import string
+import threading
 
 from mechanics import Move, Settings, Player, Game
 import ai
@@ -18,14 +21,84 @@ LARGE_BOARD_WARNING = 27
 
 # Percentage indicating how often the AI’s comments are displayed
 AI_CHATTINESS = 100
+# The same as a probability
+_chattiness_threshold = AI_CHATTINESS / 100
 
 # The board typically contains about 20 sticks. This interface is limited to
 # 62 sticks, labeled a-z, then A-Z, then 0-9 (26 + 26 + 10 = 62).
 # This is more than enough since the game does not get much more interesting
 # when the board gets really big.
-_coordinates = [chr(i) for i in range(ord('a'), ord('z') + 1)] \
-    + [chr(i) for i in range(ord('A'), ord('Z') + 1)] \
-    + [chr(i) for i in range(ord('0'), ord('9') + 1)]
+_coordinates = string.ascii_lowercase + string.ascii_uppercase + string.digits
+_max_board_size = len(_coordinates)
+
+# Reverse lookup: index of each coordinate on the board
+_coord_index = {c: i for i, c in enumerate(_coordinates)}
+
+# Turns the binary digits of a board's bitmask into sticks and empty slots
+_slots_table = str.maketrans('10', '|-')
+
+# Results of _board_layout, by board size
+_board_layouts = {}
+
+# Last output of display_board, along with the (bits, size) it was made for
+_last_board_display = (None, '')
+
+# Winning moves already printed by the cheat command, by exact board state
+# (bits, size, max_take). The same configuration can sit at different places
+# on the board, so the configuration alone is not enough as a key.
+_cheat_cache = {}
+
+# Messages and names picked at random
+_cheat_unknown_messages = (
+    "I don’t know!",
+    "I’m not strong enough",
+    "I would need an upgrade before I can answer",
+    "This is too difficult for me",
+)
+
+_cheat_hopeless_messages = (
+    "Just do whatever",
+    "Looks all the same to me",
+    "It won’t change anything",
+    "It’s all said and done anyway",
+    "I’m not going to be able to help you there",
+    "Forget it, your opponent is too strong",
+    "I don’t see any good move",
+    "I’m afraid there’s not much you can do",
+)
+
+_unknown_command_messages = (
+    "I did not get that",
+    "Sorry?",
+    "I do not know this command",
+    "I could not make sense of this",
+    "Please rephrase this",
+    "Beg your pardon?",
+    "Unknown command",
+    "Invalid command",
+    "Unrecognized input",
+)
+
+_illegal_move_messages = (
+    "Impossible move",
+    "This move cannot be played",
+    "Illegal move",
+    "This move is illegal",
+)
+
+_ai_names = (
+    "Tin can",
+    "Metal-box",
+    "Recycled dishwasher",
+    "Circuit board",
+    "Machine",
+    "Old PC",
+    "Computer",
+    "Robot",
+    "A.I.",
+    "Nim-device",
+    "Omniscience",
+)
 
 
 class PleaseRestart(Exception):
@@ -44,9 +117,15 @@ class PleaseExit(Exception):
     pass
 
 
-def display_rules(settings):
-    print(" Sticky-Nim ---- Rules ".center(SCREEN_WIDTH, '-'))
-    print("""This 2-player game is a variant of the game of Nim.
+# Banners and separator lines
+_separator = "-" * SCREEN_WIDTH
+_welcome_banner = " Sticky-Nim ".center(SCREEN_WIDTH, '=')
+_new_game_banner = " Sticky-Nim ---- New game ".center(SCREEN_WIDTH, '-')
+_goodbye_banner = " Sticky-Nim ==== See you soon! ".center(SCREEN_WIDTH, '=')
+
+# Constant parts of the rules and help screens
+_rules_text = " Sticky-Nim ---- Rules ".center(SCREEN_WIDTH, '-') + """
+This 2-player game is a variant of the game of Nim.
 - Start with a line of sticks: ||||||||||
 - On your turn, you may take up to 3 sticks from the line, anywhere you want,
   but they need to be next to each other.
@@ -67,16 +146,10 @@ Player  Action                           →  Board
 ========================================================================
 
 The starting quantity of sticks and the maximum number of sticks you are
-allowed to take every turn can be customized. Current settings:""")
-    print(f"    Starting sticks: {settings.board_size}")
-    print(f"    Maximum take   : {settings.max_take} sticks per turn")
-    print("-" * SCREEN_WIDTH)
-
+allowed to take every turn can be customized. Current settings:"""
 
-def display_help():
-    """Display the list of available commands."""
-    print(" Sticky-Nim ---- Help ".center(SCREEN_WIDTH, '-'))
-    print("""General commands:
+_help_text = " Sticky-Nim ---- Help ".center(SCREEN_WIDTH, '-') + """
+General commands:
     new       Start a new game
     settings  Change game settings (board size and max take)
     rules     Display the rules of the game
@@ -85,11 +158,40 @@ def display_help():
 In-game commands:
     [xy]      Take sticks from slots x to y on the board
     board     Redisplay the board
-    menu      Go back to the main menu""")
-    # additional purposefully undocumented in-game commands:
-    # "cheat": shows winning moves if any
-    # "takeover": lets the AI handle the rest of the game for this player
-    print("-" * SCREEN_WIDTH)
+    menu      Go back to the main menu
+""" + _separator
+# additional purposefully undocumented in-game commands:
+# "cheat": shows winning moves if any
+# "takeover": lets the AI handle the rest of the game for this player
+
+
+def display_rules(settings):
+    print(f"{_rules_text}\n"
+          f"    Starting sticks: {settings.board_size}\n"
+          f"    Maximum take   : {settings.max_take} sticks per turn\n"
+          + _separator)
+
+
+def display_help():
+    """Display the list of available commands."""
+    print(_help_text)
+
+
+def _board_layout(size):
+    """Returns the separator between slots, and the left and right padding,
+    that display_board uses to center a board of @size slots on screen.
+    """
+    if 2 * size + 3 > SCREEN_WIDTH:
+        sep = ''
+    else:
+        sep = ' '
+    # the same padding as str.center(SCREEN_WIDTH) on each line, both of which
+    # are size + 2 characters long before separators are added
+    margin = SCREEN_WIDTH - len(sep.join(' ' * (size + 2)))
+    if margin <= 0:
+        return sep, '', ''
+    left = margin // 2 + (margin & SCREEN_WIDTH & 1)
+    return sep, ' ' * left, ' ' * (margin - left)
 
 
 def display_board(board):
@@ -104,23 +206,31 @@ def display_board(board):
     If the board is too large to fit on screen, the space in between every slot
     is not printed.
     """
-    sticks = ['<']
-    letters = [' ']
-    for i, slot in enumerate(board):
-        if slot == board.a_stick:
-            sticks.append('|')
-            letters.append(_coordinates[i])
-        else:
-            sticks.append('-')
-            letters.append(' ')
-    sticks.append('>')
-    letters.append(' ')
-    if 2 * len(board) + 3 > SCREEN_WIDTH:
-        sep = ''
-    else:
-        sep = ' '
-    print(sep.join(sticks).center(SCREEN_WIDTH))
-    print(sep.join(letters).center(SCREEN_WIDTH))
+    global _last_board_display
+    size = len(board)
+    bits = board.bits
+    # the board is often displayed again without having changed, e.g. when a
+    # player types an invalid move
+    key, text = _last_board_display
+    if key == (bits, size):
+        print(text)
+        return
+    # bin() writes the last slot first, and the extra bit keeps leading gaps
+    slots = bin(bits | 1 << size)[:2:-1]
+    sticks = '<' + slots.translate(_slots_table) + '>'
+    # only the coordinates of remaining sticks are shown
+    letters = [' '] * (size + 2)
+    for start, group_size in board.to_groups():
+        letters[start + 1:start + group_size + 1] = \
+            _coordinates[start:start + group_size]
+    layout = _board_layouts.get(size)
+    if layout is None:
+        layout = _board_layouts[size] = _board_layout(size)
+    sep, left, right = layout
+    text = left + sep.join(sticks) + right + '\n' \
+        + left + sep.join(letters) + right
+    _last_board_display = (bits, size), text
+    print(text)
 
 
 def really_input(prompt=""):
@@ -142,8 +252,7 @@ def confirm(message, yes="y", no="n"):
     else:
         # Code if the user typed something else
     """
-    print(f"{message} ({yes}/{no}) ", end='')
-    choice = really_input().lower()
+    choice = really_input(f"{message} ({yes}/{no}) ").lower()
     if choice == yes:
         return True
     else:
@@ -156,10 +265,11 @@ def to_action(move):
     """Returns the string that a human would have to type if they wanted to play
     the specified move.
     """
-    action = _coordinates[move.left]
-    if len(move) > 1:
-        action += _coordinates[move.right - 1]
-    return action
+    left = move.left
+    right = move.right
+    if right - left == 1:
+        return _coordinates[left]
+    return _coordinates[left] + _coordinates[right - 1]
 
 
 def _cheat(game):
@@ -174,76 +284,121 @@ def _cheat(game):
         return
     if ai.loading_needed(game.settings):
         # The AI module would need additional computations to know the answer
-        print(random.choice([
-            "I don’t know!",
-            "I’m not strong enough",
-            "I would need an upgrade before I can answer",
-            "This is too difficult for me"
-        ]))
+        print(random.choice(_cheat_unknown_messages))
         return
-    solutions = ai._reachable_losing_configs(config)
-    if not solutions:
-        print(random.choice([
-            "Just do whatever",
-            "Looks all the same to me",
-            "It won’t change anything",
-            "It’s all said and done anyway",
-            "I’m not going to be able to help you there",
-            "Forget it, your opponent is too strong",
-            "I don’t see any good move",
-            "I’m afraid there’s not much you can do"
-        ]))
+    ai.set_rules(game.settings)  # cheap: everything needed is already known
+    key = (game.board.bits, len(game.board), game.settings.max_take)
+    if key not in _cheat_cache:
+        list_move_coords = game.board.list_move_coords
+        coords = (pair
+                  for target in ai._reachable_losing_configs(config)
+                  for pair in list_move_coords(
+                      *ai._describe_move_between(config, target)))
+        # same strings as to_action, without building Moves
+        _cheat_cache[key] = ', '.join(sorted(
+            _coordinates[left] if right - left == 1
+            else _coordinates[left] + _coordinates[right - 1]
+            for left, right in coords))
+    actions = _cheat_cache[key]
+    if not actions:
+        print(random.choice(_cheat_hopeless_messages))
     else:
-        moves = []
-        for target in solutions:
-            take, group, offset = ai._describe_move_between(config, target)
-            moves.extend(game.board.list_moves(take, group, offset))
-        print(', '.join(sorted([to_action(m) for m in moves])))
+        print(actions)
 
 
 def warn_unknown_command():
     """Print a message to warn the user that the command he typed is invalid."""
-    print(random.choice([
-        "I did not get that",
-        "Sorry?",
-        "I do not know this command",
-        "I could not make sense of this",
-        "Please rephrase this",
-        "Beg your pardon?",
-        "Unknown command",
-        "Invalid command",
-        "Unrecognized input"
-    ]))
+    print(random.choice(_unknown_command_messages))
 
 
 def errors_about_move(move, game):
     """If @move is illegal in @game, returns an error message.
     Else, returns None.
     """
-    b = game.board
-    if move.is_out_of_bounds_on(b):
+    legality = move.legality(game)
+    if legality == Move.LEGAL:
+        return None
+    elif legality == Move.OUT_OF_BOUNDS:
         return "This move seems out of bounds"
-    elif move.contains_gap_on(b):
-        if b.a_stick not in b[move.left:move.right]:
-            return "But… there are no sticks there"
-        elif b[move.left:move.right].count(b.a_stick) <= game.settings.max_take:
-            if move.strip_on(b) == move:
-                return "The sticks you take need to be next to each other"
-            else:
-                if not move.strip_on(b).contains_gap_on(b):
-                    return f"Did you mean {to_action(move.strip_on(b))}?"
-        else:
-            return random.choice([
-                "Impossible move",
-                "This move cannot be played",
-                "Illegal move",
-                "This move is illegal"
-            ])
-    elif move.takes_too_many_for(game.settings.max_take):
+    elif legality == Move.NO_STICKS:
+        return "But… there are no sticks there"
+    elif legality == Move.NOT_ADJACENT:
+        return "The sticks you take need to be next to each other"
+    elif legality == Move.EDGE_GAPS:
+        return f"Did you mean {to_action(move.strip_on(game.board))}?"
+    elif legality == Move.TOO_MANY:
         return f"Please take {game.settings.max_take} sticks at most"
     else:
-        # the move is legal
-        return None
+        return random.choice(_illegal_move_messages)
+
+
+def _load_ai(settings, message):
+    """Calls ai.set_rules with @settings, which may take a while. Meanwhile,
+    displays @message followed by a spinner so that the user can tell that the
+    program is still alive.
+    Any exception raised by ai.set_rules is raised again here.
+    """
+    errors = []
+
+    def load():
+        try:
+            ai.set_rules(settings)
+        except BaseException as e:
+            errors.append(e)
+
+    loader = threading.Thread(target=load, daemon=True)
+    loader.start()
+    for frame in itertools.cycle('|/-\\'):
+        print(f"\r{message} {frame}", end='', flush=True)
+        loader.join(0.2)
+        if not loader.is_alive():
+            break
+    if errors:
+        print()
+        raise errors[0]
+    print(f"\r{message} done")
+
+
+def _stop_game(player, game):
+    if confirm("Stop this game?"):
+        raise PleaseStop()
+
+
+def _restart_game(player, game):
+    if confirm("Restart this game?"):
+        raise PleaseRestart()
+
+
+def _quit_from_game(player, game):
+    if confirm("Quit Sticky-Nim?"):
+        raise PleaseExit()
+
+
+def _take_over(player, game):
+    # lets the AI handle moves for this player from now on
+    if ai.loading_needed(game.settings):
+        _load_ai(game.settings,
+                 f"Corrupting {player.name}’s mind, please wait...")
+    player.action = computer_action
+    player.name += " [Corrupted]"
+    return computer_action(player, game)
+
+
+# Commands available during a game. Each one is called with the current Player
+# and Game, and may return the Move that this player plays.
+_game_commands = {
+    "menu": _stop_game,
+    "new": _restart_game,
+    "quit": _quit_from_game,
+    "settings": lambda player, game:
+        print("Please go back to the main menu first"),
+    "rules": lambda player, game: display_rules(game.settings),
+    "help": lambda player, game: display_help(),
+    "board": lambda player, game: display_board(game.board),
+    # (These two commands do not show in the help)
+    "cheat": lambda player, game: _cheat(game),
+    "takeover": _take_over,
+}
 
 
 def human_action(player, game):
@@ -255,52 +410,29 @@ def human_action(player, game):
     display_board(game.board)
     while True:
         action = really_input(player.name + "> ")
-        if action == "menu":
-            if confirm("Stop this game?"):
-                raise PleaseStop()
-        elif action == "new":
-            if confirm("Restart this game?"):
-                raise PleaseRestart()
-        elif action == "quit":
-            if confirm("Quit Sticky-Nim?"):
-                raise PleaseExit()
-        elif action == "settings":
-            print("Please go back to the main menu first")
-        elif action == "rules":
-            display_rules(game.settings)
-        elif action == "help":
-            display_help()
-        elif action == "board":
-            display_board(game.board)
-        elif action == "cheat":
-            # (This command does not show in the help)
-            _cheat(game)
-        elif action == "takeover":
-            # (This command does not show in the help)
-            # lets the AI handle moves for this player from now on
-            if ai.loading_needed(game.settings):
-                print(f"Corrupting {player.name}’s mind, please wait...")
-                ai.set_rules(game.settings)
-            player.action = computer_action
-            player.name += " [Corrupted]"
-            return computer_action(player, game)
+        command = _game_commands.get(action)
+        if command is not None:
+            move = command(player, game)
+            if move is not None:
+                return move
         elif len(action) == 3:
             # address the most common input mistake beginners make:
             # they tend to type 'abc' instead of 'ac' to take 3 sticks
-            if action[0] in _coordinates and action[2] in _coordinates \
+            if action[0] in _coord_index and action[2] in _coord_index \
                     and ord(action[1]) - ord(action[0]) == 1 \
                     and ord(action[2]) - ord(action[1]) == 1:
                 print(f"did you mean {action[0]}{action[2]}? "
                       f"(this will take stick {action[1]} as well)")
             else:
                 warn_unknown_command()
-        elif len(action) <= 2 \
-                and action[0] in _coordinates \
-                and action[-1] in _coordinates:
+        elif len(action) <= 2:
             # convert the action into a pair of indices
-            end1 = _coordinates.index(action[0])
+            end1 = _coord_index.get(action[0])
             # using -1 allows for moves like "a" that only take one stick
-            end2 = _coordinates.index(action[-1])
+            end2 = _coord_index.get(action[-1])
+            if end1 is None or end2 is None:
+                warn_unknown_command()
+                continue
             # using min and max allows the user to enter coordinates from
             # right to left
             move = Move(min(end1, end2), max(end1, end2) + 1)
@@ -320,7 +452,6 @@ def computer_action(player, game):
     move’s coordinates.
     """
     display_board(game.board)
-    print(player.name + "> ", end='')
     move, message = ai.generate_move(game)
     if not move.is_legal_in(game):
         try:
@@ -329,38 +460,41 @@ def computer_action(player, game):
             action = "IndexError"
         raise Exception(f"Incorrect move from the AI: "
                         f"{move} ({action})")
-    if random.random() <= AI_CHATTINESS / 100:
-        print(message, end=' ')
-    print(to_action(move))
+    line = player.name + "> "
+    # (no need to draw a random number when the AI always talks)
+    if AI_CHATTINESS >= 100 or random.random() <= _chattiness_threshold:
+        line += message + " "
+    print(line + to_action(move))
     return move
 
 
+def _read_int(prompt):
+    """Displays @prompt until the user types an integer, then returns it."""
+    while True:
+        s = really_input(prompt)
+        # isdecimal() rather than isdigit(): int() rejects digits like '²'
+        digits = s[1:] if s[0] in '+-' else s
+        if digits.isdecimal():
+            return int(s)
+        warn_unknown_command()
+
+
 def change_settings(current_settings):
     """Makes the user input new settings for future games and returns them."""
-    print("Current settings:")
-    print(f"    Board size  : {current_settings.board_size}")
-    print(f"    Maximum take: {current_settings.max_take} sticks per turn")
+    print("Current settings:\n"
+          f"    Board size  : {current_settings.board_size}\n"
+          f"    Maximum take: {current_settings.max_take} sticks per turn")
     while True:
-        print("New board size?", end=' ')
-        try:
-            board_size = int(really_input())
-        except ValueError:
-            warn_unknown_command()
-            continue
+        board_size = _read_int("New board size? ")
         if board_size <= 0:
             print("This might be a little too small")
-        elif board_size > len(_coordinates):
-            print("Sorry, I’m limited to"
-                  f"{len(_coordinates)} sticks on the board")
+        elif board_size > _max_board_size:
+            print(f"Sorry, I’m limited to {_max_board_size} sticks "
+                  "on the board")
         else:
             break
     while True:
-        print("Maximum take per turn?", end=' ')
-        try:
-            max_take = int(really_input())
-        except ValueError:
-            warn_unknown_command()
-            continue
+        max_take = _read_int("Maximum take per turn? ")
         if max_take <= 0:
             print("Hmm, negative sticks… Too complicated for me")
         else:
@@ -377,8 +511,8 @@ def choose_players(settings):
     p = 0
     while p < 2:
         while True:
-            print(f"Player {p + 1}: human or computer? (h/c)", end=' ')
-            s = really_input().lower()
+            s = really_input(f"Player {p + 1}: human or computer? (h/c) ")
+            s = s.lower()
             if s in ('h', 'c'):
                 break
             elif s.startswith('h'):
@@ -399,22 +533,10 @@ def choose_players(settings):
                           "loading time.")
                     if not confirm("Continue?"):
                         continue   # while loop
-                print("Loading…")
-            ai.set_rules(settings)
-            ai_names = [
-                "Tin can",
-                "Metal-box",
-                "Recycled dishwasher",
-                "Circuit board",
-                "Machine",
-                "Old PC",
-                "Computer",
-                "Robot",
-                "A.I.",
-                "Nim-device",
-                "Omniscience",
-            ]
-            ai_name = f"{random.choice(ai_names)} {str(p + 1)}"
+                _load_ai(settings, "Loading…")
+            else:
+                ai.set_rules(settings)
+            ai_name = f"{random.choice(_ai_names)} {str(p + 1)}"
             players.append(Player(ai_name, computer_action))
         p += 1
     return players
@@ -437,42 +559,63 @@ def new_game(players, settings):
         return confirm("Play another game?")
 
 
+def _quit(settings):
+    raise PleaseExit()
+
+
+def _play_games(settings):
+    players = choose_players(settings)
+    keep_playing = True
+    while keep_playing:
+        print(_new_game_banner)
+        keep_playing = new_game(players, settings)
+    print(_separator)
+
+
+# Commands available from the main menu. Each one is called with the current
+# Settings, and may return new Settings. Any unambiguous prefix of a command
+# name works as well, e.g. "n" for "new".
+_menu_commands = {
+    "menu": lambda settings: None,
+    "board": lambda settings: print("Hmm, there is no ongoing game"),
+    "settings": change_settings,
+    "rules": display_rules,
+    "help": lambda settings: display_help(),
+    "quit": _quit,
+    "new": _play_games,
+}
+
+
+def _match(s, commands):
+    """Returns the only name in @commands that starts with @s, or None if there
+    is no such name or several of them.
+    """
+    if s in commands:
+        return s
+    matches = [name for name in commands if name.startswith(s)]
+    return matches[0] if len(matches) == 1 else None
+
+
 def menu():
     """Main menu input loop."""
     settings = Settings(DEFAULT_BOARD_SIZE, DEFAULT_MAX_TAKE)
     while True:
         action = really_input("menu> ")
-        if action in ["menu", "m"]:
-            pass
-        elif action == "board":
-            print("Hmm, there is no ongoing game")
-        elif action in ["settings", "s"]:
-            settings = change_settings(settings)
-        elif action in ["rules", "r"]:
-            display_rules(settings)
-        elif action in ["help", "h"]:
-            display_help()
-        elif action in ["quit", "q"]:
-            raise PleaseExit()
-        elif action in ["new", "n"]:
-            players = choose_players(settings)
-            keep_playing = True
-            while keep_playing:
-                print(" Sticky-Nim ---- New game ".center(SCREEN_WIDTH, '-'))
-                keep_playing = new_game(players, settings)
-            print("-" * SCREEN_WIDTH)
-        else:
+        command = _menu_commands.get(_match(action, _menu_commands))
+        if command is None:
             warn_unknown_command()
+        else:
+            # commands that change the settings return the new ones
+            settings = command(settings) or settings
 
 
 # ================================ Main program ================================
 
 
 if __name__ == "__main__":
-    print(" Sticky-Nim ".center(SCREEN_WIDTH, '='))
-    print("Type 'help' if you need some")
+    print(_welcome_banner + "\nType 'help' if you need some")
     try:
         menu()
     except PleaseExit:
         pass
-    print(" Sticky-Nim ==== See you soon! ".center(SCREEN_WIDTH, '='))
+    print(_goodbye_banner)